@@ -1,15 +1,29 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, flash
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import func, case
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only, raiseload
+from cachetools import TTLCache
 from datetime import datetime, timedelta
+from functools import lru_cache
 from database import db, User, Loan, EMI
 from models import LoanCalculator, LoanValidator, LOAN_CRITERIA
+import hashlib
+import orjson
 import os
+import threading
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///loan_management.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['PASSWORD_HASH_METHOD'] = 'scrypt:32768:8:1'
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'connect_args': {'check_same_thread': False, 'timeout': 30}
+}
 
 # Initialize extensions
 db.init_app(app)
@@ -19,11 +33,62 @@ login_manager.login_view = 'login'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Runs on every authenticated request, so only load the columns views and validation read
+    return User.query.options(load_only(
+        User.id, User.username, User.annual_income, User.employment_status, User.credit_score,
+        User.existing_emis, User.date_of_birth, User.employment_start_date
+    )).get(int(user_id))
 
 # Create tables
 with app.app_context():
     db.create_all()
+    # create_all skips indexes on tables that already exist, so add any missing ones
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def get_user_loans_query():
+    """Query for the current user's loans; lazy relationship loads raise in debug mode to catch N+1 queries"""
+    query = Loan.query.filter_by(user_id=current_user.id)
+    if app.debug:
+        query = query.options(raiseload('*'))
+    return query
+
+# Successful password checks, so the expensive KDF runs at most once per credential pair per minute
+verified_credentials = TTLCache(maxsize=10_000, ttl=60)
+verified_credentials_lock = threading.Lock()
+
+def verify_password(user, password):
+    """Check a password against the user's hash, reusing recent successful verifications"""
+    # The stored hash is part of the key so a password change invalidates cached entries
+    key = (user.id, user.password, hashlib.sha256(password.encode()).digest())
+    with verified_credentials_lock:
+        if key in verified_credentials:
+            return True
+    
+    if not check_password_hash(user.password, password):
+        return False
+    
+    with verified_credentials_lock:
+        verified_credentials[key] = True
+    return True
+
+def save_emi_schedule(loan_id, schedule):
+    """Persist an EMI schedule with a single bulk INSERT instead of one ORM add per month"""
+    rows = [
+        {
+            'loan_id': loan_id,
+            'emi_number': emi_data['emi_number'],
+            'due_date': emi_data['due_date'],
+            'amount_due': emi_data['emi_amount'],
+            'principal_amount': emi_data['principal_component'],
+            'interest_amount': emi_data['interest_component'],
+            'status': 'Pending'
+        }
+        for emi_data in schedule
+    ]
+    db.session.execute(EMI.__table__.insert(), rows)
+    db.session.commit()
 
 # Routes
 @app.route('/')
@@ -36,7 +101,8 @@ def register():
         username = request.form['username']
         email = request.form['email']
         password = request.form['password']
-        annual_income = float(request.form['annual_income'])
+        # Monetary amounts are quantized to paise before they are stored
+        annual_income = round(float(request.form['annual_income']), 2)
         employment_status = request.form['employment_status']
         credit_score = int(request.form['credit_score'])
         date_of_birth = datetime.strptime(request.form['date_of_birth'], '%Y-%m-%d')
@@ -46,16 +112,7 @@ def register():
         if request.form.get('employment_start_date'):
             employment_start_date = datetime.strptime(request.form['employment_start_date'], '%Y-%m-%d')
         
-        existing_emis = float(request.form.get('existing_emis', 0))
-        
-        # Check if user exists
-        if User.query.filter_by(username=username).first():
-            flash('Username already exists!', 'error')
-            return redirect(url_for('register'))
-        
-        if User.query.filter_by(email=email).first():
-            flash('Email already exists!', 'error')
-            return redirect(url_for('register'))
+        existing_emis = round(float(request.form.get('existing_emis', 0)), 2)
         
         # Validate credit score
         if credit_score < 300 or credit_score > 850:
@@ -63,7 +120,7 @@ def register():
             return redirect(url_for('register'))
         
         # Create new user
-        hashed_password = generate_password_hash(password)
+        hashed_password = generate_password_hash(password, method=app.config['PASSWORD_HASH_METHOD'], salt_length=16)
         new_user = User(
             username=username, 
             email=email, 
@@ -75,8 +132,17 @@ def register():
             employment_start_date=employment_start_date,
             existing_emis=existing_emis
         )
-        db.session.add(new_user)
-        db.session.commit()
+        # Let the UNIQUE constraints detect existing users instead of querying for them first
+        try:
+            db.session.add(new_user)
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if 'user.email' in str(e.orig):
+                flash('Email already exists!', 'error')
+            else:
+                flash('Username already exists!', 'error')
+            return redirect(url_for('register'))
         
         flash('Registration successful! Please login.', 'success')
         return redirect(url_for('login'))
@@ -91,7 +157,11 @@ def login():
         
         user = User.query.filter_by(username=username).first()
         
-        if user and check_password_hash(user.password, password):
+        if user and verify_password(user, password):
+            # Upgrade legacy PBKDF2 hashes to scrypt now that the plaintext is available
+            if user.password.startswith('pbkdf2:'):
+                user.password = generate_password_hash(password, method=app.config['PASSWORD_HASH_METHOD'], salt_length=16)
+                db.session.commit()
             login_user(user)
             flash('Login successful!', 'success')
             return redirect(url_for('dashboard'))
@@ -110,14 +180,15 @@ def logout():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    user_loans = Loan.query.filter_by(user_id=current_user.id).all()
-    total_loans = len(user_loans)
-    approved_loans = len([loan for loan in user_loans if loan.status in ['Approved', 'Auto-Approved']])
-    pending_loans = len([loan for loan in user_loans if loan.status == 'Pending'])
-    rejected_loans = len([loan for loan in user_loans if loan.status == 'Rejected'])
-    
-    # Calculate total loan amount
-    total_loan_amount = sum(loan.loan_amount for loan in user_loans if loan.status in ['Approved', 'Auto-Approved'])
+    # Aggregate loan statistics in a single query instead of loading every loan
+    is_approved = Loan.status.in_(['Approved', 'Auto-Approved'])
+    total_loans, approved_loans, pending_loans, rejected_loans, total_loan_amount = db.session.query(
+        func.count(Loan.id),
+        func.coalesce(func.sum(case((is_approved, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Loan.status == 'Pending', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Loan.status == 'Rejected', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((is_approved, Loan.loan_amount), else_=0.0)), 0.0)
+    ).filter(Loan.user_id == current_user.id).one()
     
     return render_template('dashboard.html', 
                          total_loans=total_loans,
@@ -130,7 +201,7 @@ def dashboard():
 @login_required
 def apply_loan():
     if request.method == 'POST':
-        loan_amount = float(request.form['loan_amount'])
+        loan_amount = round(float(request.form['loan_amount']), 2)
         interest_rate = float(request.form['interest_rate'])
         loan_term = int(request.form['loan_term'])
         loan_type = request.form['loan_type']
@@ -186,19 +257,7 @@ def apply_loan():
                 loan_amount, interest_rate, loan_term, start_date
             )
             
-            for emi_data in schedule:
-                emi = EMI(
-                    loan_id=new_loan.id,
-                    emi_number=emi_data['emi_number'],
-                    due_date=emi_data['due_date'],
-                    amount_due=emi_data['emi_amount'],
-                    principal_amount=emi_data['principal_component'],
-                    interest_amount=emi_data['interest_component'],
-                    status='Pending'
-                )
-                db.session.add(emi)
-            
-            db.session.commit()
+            save_emi_schedule(new_loan.id, schedule)
         
         return redirect(url_for('view_loans'))
     
@@ -207,8 +266,11 @@ def apply_loan():
 @app.route('/view_loans')
 @login_required
 def view_loans():
-    loans = Loan.query.filter_by(user_id=current_user.id).all()
-    return render_template('view_loans.html', loans=loans)
+    # Stream loans to the template in batches instead of materializing every row up front
+    loans_query = get_user_loans_query()
+    has_loans = db.session.query(loans_query.exists()).scalar()
+    loans = loans_query.yield_per(200)
+    return render_template('view_loans.html', loans=loans, has_loans=has_loans)
 
 @app.route('/emi_calculator', methods=['GET', 'POST'])
 def emi_calculator():
@@ -221,15 +283,16 @@ def emi_calculator():
         total_interest = LoanCalculator.calculate_total_interest(loan_amount, interest_rate, loan_term)
         total_payment = loan_amount + total_interest
         
+        # Only the first 12 months are shown
         schedule = LoanCalculator.generate_emi_schedule(
-            loan_amount, interest_rate, loan_term, datetime.now()
+            loan_amount, interest_rate, loan_term, datetime.now(), months=12
         )
         
         return render_template('emi_calculator.html', 
                              emi=emi, 
                              total_interest=total_interest,
                              total_payment=total_payment,
-                             schedule=schedule[:12])  # Show first 12 months
+                             schedule=schedule)
     
     return render_template('emi_calculator.html')
 
@@ -251,39 +314,35 @@ def payment_history(loan_id):
             loan.loan_amount, loan.interest_rate, loan.loan_term, loan.start_date or datetime.now()
         )
         
-        for emi_data in schedule:
-            emi = EMI(
-                loan_id=loan_id,
-                emi_number=emi_data['emi_number'],
-                due_date=emi_data['due_date'],
-                amount_due=emi_data['emi_amount'],
-                principal_amount=emi_data['principal_component'],
-                interest_amount=emi_data['interest_component'],
-                status='Pending'
-            )
-            db.session.add(emi)
-        
-        db.session.commit()
+        save_emi_schedule(loan_id, schedule)
         emis = EMI.query.filter_by(loan_id=loan_id).order_by(EMI.emi_number).all()
     
     return render_template('payment_history.html', loan=loan, emis=emis)
 
-@app.route('/api/calculate_emi', methods=['POST'])
-def api_calculate_emi():
-    data = request.get_json()
-    loan_amount = float(data['loan_amount'])
-    interest_rate = float(data['interest_rate'])
-    loan_term = int(data['loan_term'])
-    
+@lru_cache(maxsize=10_000)
+def calculate_emi_response(loan_amount, interest_rate, loan_term):
+    """Serialized EMI summary for the API, memoized on the normalized request parameters"""
     emi = LoanCalculator.calculate_emi(loan_amount, interest_rate, loan_term)
     total_interest = LoanCalculator.calculate_total_interest(loan_amount, interest_rate, loan_term)
     total_payment = loan_amount + total_interest
     
-    return jsonify({
+    return orjson.dumps({
         'emi': emi,
         'total_interest': total_interest,
         'total_payment': total_payment
     })
 
+@app.route('/api/calculate_emi', methods=['POST'])
+def api_calculate_emi():
+    data = request.get_json()
+    loan_amount = float(data['loan_amount'])
+    interest_rate = float(data['interest_rate'])
+    loan_term = int(data['loan_term'])
+    
+    # Rounding normalizes near-identical slider positions onto the same cache entry
+    body = calculate_emi_response(round(loan_amount, 2), round(interest_rate, 4), loan_term)
+    return Response(body, mimetype='application/json')
+
+# Development server only; use gunicorn.conf.py in production
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -1,9 +1,26 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from datetime import datetime
+import sqlite3
 
 db = SQLAlchemy()
 
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Use WAL journaling so readers are not blocked by writers, plus cache/mmap tuning"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
 class User(db.Model, UserMixin):  # ADD UserMixin here
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -50,6 +67,10 @@ class Loan(db.Model):
     
     # Relationship with EMI records
     emis = db.relationship('EMI', backref='loan', lazy=True)
+    
+    __table_args__ = (
+        db.Index('ix_loan_user_status', 'user_id', 'status'),
+    )
 
 class EMI(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -61,4 +82,8 @@ class EMI(db.Model):
     interest_amount = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(20), default='Pending')  # Pending, Paid, Overdue
     paid_date = db.Column(db.DateTime)
-    late_fee = db.Column(db.Float, default=0.0)
\ No newline at end of file
+    late_fee = db.Column(db.Float, default=0.0)
+    
+    __table_args__ = (
+        db.Index('ix_emi_loan_number', 'loan_id', 'emi_number'),
+    )
\ No newline at end of file
@@ -0,0 +1,16 @@
+# Production server configuration
+# Run with: gunicorn -c gunicorn.conf.py app:app
+import multiprocessing
+
+bind = '0.0.0.0:8000'
+workers = multiprocessing.cpu_count() * 2 + 1
+worker_class = 'gthread'
+threads = 4
+preload_app = True
+
+def post_fork(server, worker):
+    # Connections opened while preloading the app must not be shared with forked workers
+    from app import app
+    from database import db
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -1,8 +1,22 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-import math
+from functools import lru_cache
+import numpy as np
+
+@dataclass(frozen=True, slots=True)
+class LoanCriteria:
+    """Eligibility thresholds for a single loan type"""
+    min_age: int
+    max_age_maturity: int
+    min_income: int
+    min_employment_years: int
+    min_credit_score: int
+    max_dti_ratio: int
+    min_interest_rate: float
+    max_loan_to_income: int
 
 # Loan type specific criteria
-LOAN_CRITERIA = {
+_RAW_LOAN_CRITERIA = {
     'Personal Loan': {
         'min_age': 21,
         'max_age_maturity': 65,
@@ -55,71 +69,102 @@ LOAN_CRITERIA = {
     }
 }
 
+LOAN_CRITERIA = {loan_type: LoanCriteria(**values) for loan_type, values in _RAW_LOAN_CRITERIA.items()}
+
+@lru_cache(maxsize=4096)
+def _emi_cached(principal, annual_rate, tenure_months):
+    """Memoized EMI kernel; callers quantize annual_rate to 4 decimals for a better hit rate"""
+    monthly_rate = annual_rate / 12 / 100
+    if monthly_rate == 0:
+        return round(principal / tenure_months, 2)
+    factor = (1.0 + monthly_rate) ** tenure_months
+    emi = principal * monthly_rate * factor / (factor - 1.0)
+    return round(emi, 2)
+
+def _emi_schedule_rows(loan_amount, interest_rate, loan_term, months):
+    """(emi, principal, interest, remaining) rows for the first `months` EMIs of a loan"""
+    emi_amount = _emi_cached(loan_amount, interest_rate, loan_term)
+    monthly_rate = interest_rate / 12 / 100
+    
+    # Closed-form amortization: the principal component grows by (1+r) every month, so the
+    # principal repaid after k EMIs is a geometric series with no loop-carried running balance
+    emi_numbers = np.arange(1, months + 1)
+    first_principal = emi_amount - loan_amount * monthly_rate
+    growth = np.power(1 + monthly_rate, emi_numbers - 1)
+    principal_components = first_principal * growth
+    interest_components = emi_amount - principal_components
+    if monthly_rate == 0:
+        repaid_principals = first_principal * emi_numbers
+    else:
+        repaid_principals = first_principal * (growth * (1 + monthly_rate) - 1) / monthly_rate
+    remaining_principals = loan_amount - repaid_principals
+    emi_amounts = np.full(months, emi_amount)
+    
+    # For the last EMI, adjust principal component to absorb the paise lost rounding the EMI
+    if months == loan_term:
+        principal_components[-1] += remaining_principals[-1]
+        emi_amounts[-1] = principal_components[-1] + interest_components[-1]
+        remaining_principals[-1] = 0.0
+    
+    return tuple(zip(
+        np.round(emi_amounts, 2).tolist(),
+        np.round(principal_components, 2).tolist(),
+        np.round(interest_components, 2).tolist(),
+        np.round(remaining_principals, 2).tolist()
+    ))
+
+# Only partial schedules (the calculator preview) are memoized; full-term schedules are built
+# once per loan and would just pin hundreds of rows each in every worker
+_emi_schedule_cached = lru_cache(maxsize=2048)(_emi_schedule_rows)
+
 class LoanCalculator:
     @staticmethod
     def calculate_emi(principal, annual_rate, tenure_months):
         """Calculate EMI using the formula: EMI = P * r * (1+r)^n / ((1+r)^n - 1)"""
-        monthly_rate = annual_rate / 12 / 100
-        emi = (principal * monthly_rate * math.pow(1 + monthly_rate, tenure_months)) / (
-            math.pow(1 + monthly_rate, tenure_months) - 1
-        )
-        return round(emi, 2)
+        return _emi_cached(principal, round(annual_rate, 4), tenure_months)
     
     @staticmethod
-    def generate_emi_schedule(loan_amount, interest_rate, loan_term, start_date):
-        """Generate complete EMI schedule for a loan"""
-        emi_amount = LoanCalculator.calculate_emi(loan_amount, interest_rate, loan_term)
-        monthly_rate = interest_rate / 12 / 100
-        schedule = []
-        
-        remaining_principal = loan_amount
+    def generate_emi_schedule(loan_amount, interest_rate, loan_term, start_date, months=None):
+        """Generate the EMI schedule for a loan, optionally only its first `months` installments"""
+        months = loan_term if months is None else min(months, loan_term)
+        # Amounts are computed independently of start_date; due dates are attached per call
+        build_rows = _emi_schedule_rows if months == loan_term else _emi_schedule_cached
+        rows = build_rows(round(loan_amount, 2), round(interest_rate, 4), loan_term, months)
         
-        for i in range(1, loan_term + 1):
-            interest_component = remaining_principal * monthly_rate
-            principal_component = emi_amount - interest_component
-            
-            # For the last EMI, adjust principal component
-            if i == loan_term:
-                principal_component = remaining_principal
-                emi_amount = principal_component + interest_component
-            
-            due_date = start_date + timedelta(days=30 * i)
-            
-            schedule.append({
+        return [
+            {
                 'emi_number': i,
-                'due_date': due_date,
-                'emi_amount': round(emi_amount, 2),
-                'principal_component': round(principal_component, 2),
-                'interest_component': round(interest_component, 2),
-                'remaining_principal': round(remaining_principal - principal_component, 2)
-            })
-            
-            remaining_principal -= principal_component
-        
-        return schedule
+                'due_date': start_date + timedelta(days=30 * i),
+                'emi_amount': emi,
+                'principal_component': principal,
+                'interest_component': interest,
+                'remaining_principal': remaining
+            }
+            for i, (emi, principal, interest, remaining) in enumerate(rows, start=1)
+        ]
     
     @staticmethod
     def calculate_total_interest(loan_amount, interest_rate, loan_term):
         """Calculate total interest payable"""
-        emi = LoanCalculator.calculate_emi(loan_amount, interest_rate, loan_term)
+        emi = _emi_cached(loan_amount, round(interest_rate, 4), loan_term)
         total_payment = emi * loan_term
         return round(total_payment - loan_amount, 2)
 
 class LoanValidator:
     @staticmethod
-    def calculate_age(birth_date):
+    def calculate_age(birth_date, today=None):
         """Calculate age from birth date"""
         if not birth_date:
             return 0
-        today = datetime.today()
+        today = today or datetime.today()
         return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
     
     @staticmethod
-    def calculate_employment_years(employment_start_date):
+    def calculate_employment_years(employment_start_date, today=None):
         """Calculate years of employment"""
         if not employment_start_date:
             return 0
-        employment_duration = (datetime.today() - employment_start_date).days / 365.25
+        employment_duration = ((today or datetime.today()) - employment_start_date).days / 365.25
         return round(employment_duration, 1)
     
     @staticmethod
@@ -137,43 +182,44 @@ class LoanValidator:
         criteria = LOAN_CRITERIA.get(loan_type, LOAN_CRITERIA['Personal Loan'])
         issues = []
         
-        # Calculate values
-        age = LoanValidator.calculate_age(user.date_of_birth)
-        employment_years = LoanValidator.calculate_employment_years(user.employment_start_date)
+        # Calculate values against a single reading of the clock
+        today = datetime.today()
+        age = LoanValidator.calculate_age(user.date_of_birth, today)
+        employment_years = LoanValidator.calculate_employment_years(user.employment_start_date, today)
         new_loan_emi = LoanCalculator.calculate_emi(loan_amount, interest_rate, loan_term)
         dti_ratio = LoanValidator.calculate_dti_ratio(user, new_loan_emi)
         loan_to_income = loan_amount / user.annual_income if user.annual_income > 0 else float('inf')
         age_at_maturity = age + (loan_term / 12)
         
         # Age validation
-        if age < criteria['min_age']:
-            issues.append(f"Minimum age required: {criteria['min_age']} years")
-        if age_at_maturity > criteria['max_age_maturity']:
-            issues.append(f"Maximum age at loan maturity: {criteria['max_age_maturity']} years")
+        if age < criteria.min_age:
+            issues.append(f"Minimum age required: {criteria.min_age} years")
+        if age_at_maturity > criteria.max_age_maturity:
+            issues.append(f"Maximum age at loan maturity: {criteria.max_age_maturity} years")
         
         # Income validation
-        if user.annual_income < criteria['min_income']:
-            issues.append(f"Minimum annual income required: ₹{criteria['min_income']:,.0f}")
+        if user.annual_income < criteria.min_income:
+            issues.append(f"Minimum annual income required: ₹{criteria.min_income:,.0f}")
         
         # Employment validation
-        if employment_years < criteria['min_employment_years']:
-            issues.append(f"Minimum employment years required: {criteria['min_employment_years']}")
+        if employment_years < criteria.min_employment_years:
+            issues.append(f"Minimum employment years required: {criteria.min_employment_years}")
         
         # Credit score validation
-        if user.credit_score < criteria['min_credit_score']:
-            issues.append(f"Minimum credit score required: {criteria['min_credit_score']}")
+        if user.credit_score < criteria.min_credit_score:
+            issues.append(f"Minimum credit score required: {criteria.min_credit_score}")
         
         # DTI ratio validation
-        if dti_ratio > criteria['max_dti_ratio']:
-            issues.append(f"Maximum Debt-to-Income ratio: {criteria['max_dti_ratio']}% (Your DTI: {dti_ratio:.1f}%)")
+        if dti_ratio > criteria.max_dti_ratio:
+            issues.append(f"Maximum Debt-to-Income ratio: {criteria.max_dti_ratio}% (Your DTI: {dti_ratio:.1f}%)")
         
         # Interest rate validation
-        if interest_rate < criteria['min_interest_rate']:
-            issues.append(f"Minimum interest rate: {criteria['min_interest_rate']}%")
+        if interest_rate < criteria.min_interest_rate:
+            issues.append(f"Minimum interest rate: {criteria.min_interest_rate}%")
         
         # Loan to income ratio
-        if loan_to_income > criteria['max_loan_to_income']:
-            issues.append(f"Maximum loan-to-income ratio: {criteria['max_loan_to_income']}x")
+        if loan_to_income > criteria.max_loan_to_income:
+            issues.append(f"Maximum loan-to-income ratio: {criteria.max_loan_to_income}x")
         
         return issues, {
             'age': age,